@@ -12,6 +12,9 @@ CREATE TABLE IF NOT EXISTS tweets (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Index used to read the newest tweets of each followee for the home timeline
+CREATE INDEX IF NOT EXISTS ix_tweets_user_id_created_at ON tweets (user_id, created_at);
+
 
 -- Insert some data into the tables
 INSERT INTO 
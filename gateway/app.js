@@ -194,6 +194,45 @@ app.use((req, res, next) => {
   next()
 })
 
+/**
+ * @swagger
+ * /users:
+ *   get:
+ *     summary: Retrieve the public profiles of several users
+ *     description: Retrieve the id and username of every user in the ids list with a single call. Unknown ids are skipped.
+ *     parameters:
+ *       - in: query
+ *         name: ids
+ *         schema:
+ *           type: string
+ *         required: true
+ *         description: Comma separated list of numeric user IDs, e.g. 1,2,3.
+ *     responses:
+ *       200:
+ *         description: The public profiles of the users.
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               properties:
+ *                 users:
+ *                   type: array
+ *                   items:
+ *                     type: object
+ *                     properties:
+ *                       id:
+ *                         type: integer
+ *                       username:
+ *                         type: string
+ *       400:
+ *         description: ids is not a comma separated list of integers.
+ */
+app.get('/users', async (req, res) => {
+  const query = new URLSearchParams({ ids: req.query.ids || '' }).toString()
+  const { statusCode, responseBody } = await callService('user', 'get', `users?${query}`, req.body)
+  res.status(statusCode).json(responseBody)
+})
+
 /**
  * @swagger
  * /users/register:
@@ -497,6 +536,25 @@ app.delete('/tweets/:tweetId', async (req, res) => {
  *           type: integer
  *         required: true
  *         description: Numeric ID of the user to get the home timeline for.
+ *       - in: query
+ *         name: limit
+ *         schema:
+ *           type: integer
+ *         required: false
+ *         description: Maximum number of tweets to return, newest first (default 20, at most 100).
+ *       - in: query
+ *         name: before
+ *         schema:
+ *           type: string
+ *         required: false
+ *         description: Cursor returned as next_before by the previous page, only older tweets are returned.
+ *       - in: query
+ *         name: expand
+ *         schema:
+ *           type: string
+ *           enum: [author]
+ *         required: false
+ *         description: Set to author to include the id and username of each tweet's author.
  *     responses:
  *       200:
  *         description: The home timeline of the user.
@@ -522,11 +580,15 @@ app.delete('/tweets/:tweetId', async (req, res) => {
  *                       created_at:
  *                         type: string
  *                         description: The timestamp when the tweet was created.
+ *                 next_before:
+ *                   type: string
+ *                   description: Cursor for the next page, missing on the last page.
  *       400:
  *         description: Error occurred while fetching followings.
  */
 app.get('/tweets/homeTimeline/:userId', async (req, res) => {
-  const { statusCode, responseBody } = await callService('tweet', 'get', `tweets/homeTimeline/${req.params.userId}`, req.body)
+  const query = new URLSearchParams(req.query).toString()
+  const { statusCode, responseBody } = await callService('tweet', 'get', `tweets/homeTimeline/${req.params.userId}?${query}`, req.body)
   res.status(statusCode).json(responseBody)
 })
 
@@ -543,6 +605,13 @@ app.get('/tweets/homeTimeline/:userId', async (req, res) => {
  *           type: integer
  *         required: true
  *         description: Numeric ID of the user to get the user timeline for.
+ *       - in: query
+ *         name: expand
+ *         schema:
+ *           type: string
+ *           enum: [author]
+ *         required: false
+ *         description: Set to author to include the id and username of each tweet's author.
  *     responses:
  *       200:
  *         description: The user timeline of the user.
@@ -570,7 +639,8 @@ app.get('/tweets/homeTimeline/:userId', async (req, res) => {
  *                         description: The timestamp when the tweet was created.
  */
 app.get('/tweets/userTimeline/:userId', async (req, res) => {
-  const { statusCode, responseBody } = await callService('tweet', 'get', `tweets/userTimeline/${req.params.userId}`, req.body)
+  const query = new URLSearchParams(req.query).toString()
+  const { statusCode, responseBody } = await callService('tweet', 'get', `tweets/userTimeline/${req.params.userId}?${query}`, req.body)
   res.status(statusCode).json(responseBody)
 })
 
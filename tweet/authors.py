@@ -0,0 +1,44 @@
+import requests
+from fastapi import HTTPException
+
+from schemas import Author
+from schemas import Tweet as schemasTweet
+
+
+# Ids sent in one GET /users call, must not exceed USERS_BATCH_MAX_IDS of the
+# user service or pages with more distinct authors would be rejected
+AUTHORS_BATCH_SIZE = 100
+
+
+def fetch_authors(userservice_url: str, user_ids: list[int]):
+    authors = {}
+
+    for start in range(0, len(user_ids), AUTHORS_BATCH_SIZE):
+        ids = ','.join(str(user_id) for user_id in user_ids[start:start + AUTHORS_BATCH_SIZE])
+        response = requests.get(f"{userservice_url}/users", params={"ids": ids})
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=400, detail="Error occurred while fetching authors."
+            )
+
+        authors.update({user['id']: Author(**user) for user in response.json()['users']})
+
+    return authors
+
+
+def hydrate_authors(tweets: list[schemasTweet], userservice_url: str):
+    user_ids = list(dict.fromkeys(tweet.user_id for tweet in tweets))
+    if not user_ids:
+        return tweets
+
+    # One batched call for every AUTHORS_BATCH_SIZE distinct authors on the page
+    authors = fetch_authors(userservice_url, user_ids)
+
+    return [schemasTweet(
+        id=tweet.id,
+        user_id=tweet.user_id,
+        content=tweet.content,
+        created_at=tweet.created_at,
+        author=authors.get(tweet.user_id)
+    ) for tweet in tweets]
@@ -0,0 +1,160 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        with self.lock:
+            for i, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def metrics(self, name: str, help: str):
+        lines = [
+            f'# HELP {name} {help}',
+            f'# TYPE {name} histogram'
+        ]
+
+        with self.lock:
+            for bucket, counter in zip(self.buckets, self.counts):
+                lines.append(f'{name}_bucket{{le="{bucket}"}} {counter}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+            lines.append(f'{name}_sum {self.sum}')
+            lines.append(f'{name}_count {self.count}')
+
+        return lines
+
+
+class GroupCommitter:
+    """Writes concurrent single-item writes in one shared transaction.
+
+    `submit(write)` queues `write` and blocks until its batch is committed. A
+    background thread collects writes for up to `max_delay_ms` or until
+    `max_batch_size` are queued, runs each one inside its own SAVEPOINT and
+    commits the batch once. A write that raises only rolls back its own
+    savepoint and its caller gets that exception; if the commit itself fails,
+    every caller in the batch gets the commit error.
+
+    A caller that waits longer than `timeout_seconds` gets a TimeoutError. Its
+    write is dropped if the batch hasn't started yet, otherwise it may still be
+    committed.
+    """
+
+    def __init__(self, session_factory, max_batch_size: int = 64, max_delay_ms: int = 5, timeout_seconds: float = 5):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.timeout_seconds = timeout_seconds
+        self.queue = queue.Queue()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_seconds = Histogram(WAIT_SECONDS_BUCKETS)
+
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, write):
+        future = Future()
+        self.queue.put((write, future, time.monotonic()))
+
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError("Group commit did not finish in time")
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get()]
+                deadline = time.monotonic() + self.max_delay
+
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self.queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                self._commit(batch)
+            except Exception:
+                # The callers of the batch are already resolved by _commit,
+                # the worker must keep serving the next ones
+                logger.exception("Group commit batch failed")
+
+    def _commit(self, batch):
+        # Writes whose caller already gave up are skipped
+        running = [
+            (write, future, queued_at)
+            for write, future, queued_at in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        self.batch_sizes.observe(len(running))
+        outcomes = {}
+        failure = None
+        session = None
+
+        try:
+            session = self.session_factory()
+            for write, future, _ in running:
+                try:
+                    with session.begin_nested():
+                        outcomes[future] = (write(session), None)
+                except Exception as error:
+                    outcomes[future] = (None, error)
+
+            session.commit()
+        except Exception as error:
+            failure = error
+            if session is not None:
+                session.rollback()
+        finally:
+            try:
+                if session is not None:
+                    session.close()
+            finally:
+                self._resolve(running, outcomes, failure)
+
+    def _resolve(self, running, outcomes, failure):
+        now = time.monotonic()
+
+        for _, future, queued_at in running:
+            self.wait_seconds.observe(now - queued_at)
+            result, error = outcomes.get(future, (None, None))
+
+            # Nothing of the batch was committed, unless the write failed on
+            # its own every caller gets the batch failure
+            if failure is not None or future not in outcomes:
+                error = error or failure or RuntimeError("Group commit batch was aborted")
+
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def metrics(self):
+        return (
+            self.batch_sizes.metrics('group_commit_batch_size', 'Number of writes committed in one transaction.')
+            + self.wait_seconds.metrics('group_commit_wait_seconds', 'Time from queueing a write until its batch is committed.')
+        )
@@ -2,7 +2,7 @@ import os
 import asyncio
 
 import requests
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
@@ -10,6 +10,10 @@ from sqlalchemy.orm import Session, sessionmaker
 from models import Tweet, Base
 from schemas import TweetIn, TweetOut, Message, HomeTimeline, UserTimeline
 from schemas import Tweet as schemasTweet
+from timeline import get_home_timeline_page, parse_cursor, make_cursor
+from authors import hydrate_authors
+from singleflight import SingleFlight
+from groupcommit import GroupCommitter
 
 
 # Database Connection Settings
@@ -40,6 +44,28 @@ SERVICE_DISCOVERY_URL = f"http://{SERVICE_DISCOVERY_HOST}:{SERVICE_DISCOVERY_POR
 SELF_HOST = os.getenv('HOSTNAME') or 'localhost'
 SELF_PORT = os.getenv('SELF_PORT') or '8001'
 TIMEOUT_SECONDS = 5
+TIMELINE_PAGE_SIZE = 20
+TIMELINE_MAX_PAGE_SIZE = 100
+
+
+# Request Coalescing Settings
+SINGLEFLIGHT_MAX_WAITERS = int(os.getenv('SINGLEFLIGHT_MAX_WAITERS') or '100')
+single_flight = SingleFlight(max_waiters=SINGLEFLIGHT_MAX_WAITERS)
+
+
+# Group Commit Settings
+GROUP_COMMIT_ENABLED = (os.getenv('GROUP_COMMIT_ENABLED') or 'false').lower() in ('1', 'true')
+GROUP_COMMIT_MAX_BATCH_SIZE = int(os.getenv('GROUP_COMMIT_MAX_BATCH_SIZE') or '64')
+GROUP_COMMIT_MAX_DELAY_MS = int(os.getenv('GROUP_COMMIT_MAX_DELAY_MS') or '5')
+# Shorter than timeout_middleware, so a stalled committer answers the request
+# itself and frees the handler thread instead of leaking it past the 408
+GROUP_COMMIT_TIMEOUT_SECONDS = TIMEOUT_SECONDS - 1
+group_committer = GroupCommitter(
+    SessionLocal,
+    max_batch_size=GROUP_COMMIT_MAX_BATCH_SIZE,
+    max_delay_ms=GROUP_COMMIT_MAX_DELAY_MS,
+    timeout_seconds=GROUP_COMMIT_TIMEOUT_SECONDS
+) if GROUP_COMMIT_ENABLED else None
 
 app = FastAPI()
 
@@ -105,6 +131,11 @@ def metrics():
     for status_code, counter in status_codes.items():
         list.append(f'http_requests_total{{code="{status_code}"}} {counter}')
 
+    list.extend(single_flight.metrics())
+
+    if group_committer is not None:
+        list.extend(group_committer.metrics())
+
     return '\n'.join(list)
 
 
@@ -122,17 +153,28 @@ def read_status():
 
 @app.post("/tweets", response_model=TweetOut)
 def create_tweet(tweet: TweetIn, db: Session = Depends(get_db)):
-    new_tweet = Tweet(user_id=tweet.userId, content=tweet.content)
-    db.add(new_tweet)
+    def write_tweet(session: Session):
+        new_tweet = Tweet(user_id=tweet.userId, content=tweet.content)
+        session.add(new_tweet)
+        session.flush()
+
+        return TweetOut(
+            tweetId=new_tweet.id,
+            userId=new_tweet.user_id,
+            content=new_tweet.content,
+            timestamp=str(new_tweet.created_at)
+        )
+
+    if group_committer is not None:
+        try:
+            return group_committer.submit(write_tweet)
+        except TimeoutError:
+            return JSONResponse(status_code=408, content={"error": "Request timed out"})
+
+    response = write_tweet(db)
     db.commit()
-    db.refresh(new_tweet)
 
-    return TweetOut(
-        tweetId=new_tweet.id,
-        userId=new_tweet.user_id,
-        content=new_tweet.content,
-        timestamp=str(new_tweet.created_at)
-    )
+    return response
 
 
 @app.delete("/tweets/{tweetId}", response_model=Message)
@@ -147,50 +189,93 @@ def delete_tweet(tweetId: int, db: Session = Depends(get_db)):
     return Message(message=f"Tweet {tweetId} has been deleted successfully.")
 
 
-@app.get("/tweets/homeTimeline/{userId}", response_model=HomeTimeline)
-def get_home_timeline(userId: int, db: Session = Depends(get_db)):
+def fetch_services():
+    response = requests.get(f"{SERVICE_DISCOVERY_URL}/services")
+    return response.json()
+
+
+def get_userservice_url():
     # Get service discovery data
-    service_discovery_response = requests.get(f"{SERVICE_DISCOVERY_URL}/services")
-    service_discovery_data = service_discovery_response.json()
+    service_discovery_data = single_flight.do("discovery_services", (), fetch_services)
 
     # Extract userServices and construct USERSERVICE_URL
     user_services = service_discovery_data.get('userServices', [])
     if not user_services:
         raise HTTPException(status_code=400, detail="No user services available.")
-    
+
     first_user_service = user_services[0]
-    userservice_url = f"http://{first_user_service['host']}:{first_user_service['port']}"
+    return f"http://{first_user_service['host']}:{first_user_service['port']}"
+
+
+def fetch_followings(userservice_url: str, userId: int):
+    response = requests.get(f"{userservice_url}/users/{userId}/followings")
+    if response.status_code != 200:
+        return response.status_code, None
+    return response.status_code, response.json()
+
+
+@app.get("/tweets/homeTimeline/{userId}", response_model=HomeTimeline, response_model_exclude_none=True)
+def get_home_timeline(
+    userId: int,
+    limit: int = Query(TIMELINE_PAGE_SIZE, ge=1, le=TIMELINE_MAX_PAGE_SIZE),
+    before: str | None = None,
+    expand: str | None = None,
+    db: Session = Depends(get_db)
+):
+    cursor = None
+    if before is not None:
+        try:
+            cursor = parse_cursor(before)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="before must be a <created_at>,<id> cursor")
+
+    userservice_url = get_userservice_url()
     
     # Fetch followings
-    response = requests.get(f"{userservice_url}/users/{userId}/followings")
+    status_code, followings_data = single_flight.do(
+        "user_followings", (userservice_url, userId),
+        lambda: fetch_followings(userservice_url, userId)
+    )
 
-    if response.status_code != 200:
+    if status_code != 200:
         raise HTTPException(
             status_code=400, detail="Error occurred while fetching followings."
         )
 
-    followings = response.json()['followings']
-    tweets = db.query(Tweet).filter(Tweet.user_id.in_(followings)).all()
+    followings = followings_data['followings']
+    page = get_home_timeline_page(db, followings, limit, cursor)
+    next_before = make_cursor(page[-1]) if len(page) == limit else None
     tweets = [schemasTweet(
         id=tweet.id,
         user_id=tweet.user_id,
         content=tweet.content,
         created_at=tweet.created_at
-    ) for tweet in tweets]
+    ) for tweet in page]
 
-    return HomeTimeline(tweets=tweets)
+    if expand == 'author':
+        tweets = hydrate_authors(tweets, userservice_url)
 
+    return HomeTimeline(tweets=tweets, next_before=next_before)
 
-@app.get("/tweets/userTimeline/{userId}", response_model=UserTimeline)
-def get_user_timeline(userId: int, db: Session = Depends(get_db)):
-    tweets = db.query(Tweet).filter(Tweet.user_id == userId).all()
-    tweets = [schemasTweet(
-        id=tweet.id,
-        user_id=tweet.user_id,
-        content=tweet.content,
-        created_at=tweet.created_at
-    ) for tweet in tweets]
-    return UserTimeline(tweets=tweets)
+
+@app.get("/tweets/userTimeline/{userId}", response_model=UserTimeline, response_model_exclude_none=True)
+def get_user_timeline(userId: int, expand: str | None = None, db: Session = Depends(get_db)):
+    def query_user_timeline():
+        tweets = db.query(Tweet).filter(Tweet.user_id == userId).all()
+        tweets = [schemasTweet(
+            id=tweet.id,
+            user_id=tweet.user_id,
+            content=tweet.content,
+            created_at=tweet.created_at
+        ) for tweet in tweets]
+        return UserTimeline(tweets=tweets)
+
+    timeline = single_flight.do("get_user_timeline", (userId,), query_user_timeline)
+
+    if expand == 'author':
+        return UserTimeline(tweets=hydrate_authors(timeline.tweets, get_userservice_url()))
+
+    return timeline
 
 
 import uuid
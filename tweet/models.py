@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 import datetime
 
@@ -11,3 +11,7 @@ class Tweet(Base):
     user_id = Column(Integer, nullable=False)
     content = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_tweets_user_id_created_at', 'user_id', 'created_at'),
+    )
@@ -1,4 +1,6 @@
 from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -18,15 +20,22 @@ class Message(BaseModel):
     message: str
 
 
+class Author(BaseModel):
+    id: int
+    username: str
+
+
 class Tweet(BaseModel):
     id: int
     user_id: int
     content: str
     created_at: datetime
+    author: Optional[Author] = None
 
 
 class HomeTimeline(BaseModel):
     tweets: list[Tweet]
+    next_before: Optional[str] = None
 
 
 class UserTimeline(BaseModel):
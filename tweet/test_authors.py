@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import authors
+from authors import hydrate_authors
+from schemas import Tweet
+
+
+USERSERVICE_URL = "http://user_service:8000"
+
+
+class StubResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def tweet(id, user_id):
+    return Tweet(id=id, user_id=user_id, content=f"tweet {id}", created_at=datetime(2023, 10, 1, 12, id))
+
+
+def stub_user_service(monkeypatch, users, status_code=200):
+    calls = []
+
+    # Same contract as GET /users: known ids only, in the requested order
+    def get(url, params):
+        calls.append((url, params))
+        ids = [int(user_id) for user_id in params["ids"].split(',')]
+        return StubResponse(status_code, {"users": [users[user_id] for user_id in ids if user_id in users]})
+
+    monkeypatch.setattr(authors.requests, 'get', get)
+    return calls
+
+
+def test_hydrates_authors_with_one_call(monkeypatch):
+    users = {1: {"id": 1, "username": "elon.musk"}, 2: {"id": 2, "username": "bill.gates"}}
+    calls = stub_user_service(monkeypatch, users)
+
+    tweets = hydrate_authors([tweet(1, 1), tweet(2, 2), tweet(3, 1), tweet(4, 3)], USERSERVICE_URL)
+
+    assert calls == [(f"{USERSERVICE_URL}/users", {"ids": "1,2,3"})]
+    assert [tweet.author.username if tweet.author else None for tweet in tweets] == [
+        "elon.musk", "bill.gates", "elon.musk", None
+    ]
+    assert [tweet.id for tweet in tweets] == [1, 2, 3, 4]
+
+
+def test_splits_large_pages_into_batches(monkeypatch):
+    monkeypatch.setattr(authors, 'AUTHORS_BATCH_SIZE', 2)
+    users = {user_id: {"id": user_id, "username": f"user{user_id}"} for user_id in range(1, 6)}
+    calls = stub_user_service(monkeypatch, users)
+
+    tweets = hydrate_authors([tweet(user_id, user_id) for user_id in range(1, 6)], USERSERVICE_URL)
+
+    assert [params["ids"] for _, params in calls] == ["1,2", "3,4", "5"]
+    assert [tweet.author.username for tweet in tweets] == [f"user{user_id}" for user_id in range(1, 6)]
+
+
+def test_empty_page_makes_no_call(monkeypatch):
+    calls = stub_user_service(monkeypatch, {})
+
+    assert hydrate_authors([], USERSERVICE_URL) == []
+    assert calls == []
+
+
+def test_user_service_error_is_a_400(monkeypatch):
+    stub_user_service(monkeypatch, {}, status_code=500)
+
+    with pytest.raises(HTTPException) as error:
+        hydrate_authors([tweet(1, 1)], USERSERVICE_URL)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Error occurred while fetching authors."
@@ -0,0 +1,94 @@
+import os
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import main
+from main import app, get_db
+from models import Base, Tweet
+from groupcommit import GroupCommitter
+
+
+# Delete the previous test.db file in case it exists
+if os.path.exists("test.db"):
+    os.remove("test.db")
+
+
+# Set up the test database and session
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+
+# Dependency override for get_db
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+
+# Create test client and define tests
+client = TestClient(app)
+
+def assert_tweet_persisted(tweet):
+    db = TestingSessionLocal()
+    try:
+        db_tweet = db.query(Tweet).filter(Tweet.id == tweet["tweetId"]).first()
+        assert db_tweet is not None
+        assert db_tweet.user_id == tweet["userId"]
+        assert db_tweet.content == tweet["content"]
+        assert str(db_tweet.created_at) == tweet["timestamp"]
+    finally:
+        db.close()
+
+
+def test_read_status():
+    response = client.get("/status")
+    assert response.status_code == 200
+    assert response.json() == {"status": "OK"}
+
+
+def test_create_tweet():
+    response = client.post("/tweets", json={"userId": 1, "content": "Hello, Twitterverse!"})
+    assert response.status_code == 200
+    tweet = response.json()
+    assert tweet["userId"] == 1
+    assert tweet["content"] == "Hello, Twitterverse!"
+    assert_tweet_persisted(tweet)
+
+
+def test_create_tweet_with_group_commit(monkeypatch):
+    monkeypatch.setattr(main, "group_committer", GroupCommitter(TestingSessionLocal, max_delay_ms=20))
+
+    # Send several tweets at the same time so they can share a commit
+    responses = {}
+
+    def post_tweet(user_id):
+        responses[user_id] = client.post("/tweets", json={"userId": user_id, "content": f"Tweet by {user_id}"})
+
+    threads = [threading.Thread(target=post_tweet, args=(user_id,)) for user_id in range(10, 13)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every caller gets its own tweet, with the id and timestamp filled in by the flush
+    tweet_ids = set()
+    for user_id, response in responses.items():
+        assert response.status_code == 200
+        tweet = response.json()
+        assert tweet["userId"] == user_id
+        assert tweet["content"] == f"Tweet by {user_id}"
+        assert tweet["tweetId"] > 0
+        assert tweet["timestamp"] not in ("", "None")
+        tweet_ids.add(tweet["tweetId"])
+        assert_tweet_persisted(tweet)
+
+    assert len(tweet_ids) == 3
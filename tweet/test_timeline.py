@@ -0,0 +1,90 @@
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+
+import timeline
+from timeline import get_home_timeline_page, parse_cursor, make_cursor
+
+
+Row = namedtuple('Row', ['id', 'user_id', 'content', 'created_at'])
+
+
+def tweet(id, user_id, minute):
+    return Row(id=id, user_id=user_id, content=f"tweet {id}", created_at=datetime(2023, 10, 1, 12, minute))
+
+
+def stub_fetch_batch(monkeypatch, tweets):
+    calls = []
+
+    # Same contract as the SQL: newest first, at most `limit` rows per batch
+    def fetch_batch(db, followee_ids, limit, before=None):
+        calls.append(followee_ids)
+        rows = [row for row in tweets if row.user_id in followee_ids]
+        if before is not None:
+            rows = [row for row in rows if (row.created_at, row.id) < before]
+        rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+        return rows[:limit]
+
+    monkeypatch.setattr(timeline, 'fetch_batch', fetch_batch)
+    return calls
+
+
+def test_empty_followings(monkeypatch):
+    calls = stub_fetch_batch(monkeypatch, [tweet(1, 1, 0)])
+
+    assert get_home_timeline_page(None, [], 20) == []
+    assert calls == []
+
+
+def test_merges_sorted_batches(monkeypatch):
+    monkeypatch.setattr(timeline, 'FOLLOWEES_BATCH_SIZE', 2)
+    tweets = [tweet(1, 1, 0), tweet(2, 2, 5), tweet(3, 3, 3), tweet(4, 4, 9), tweet(5, 5, 1), tweet(6, 1, 7)]
+    calls = stub_fetch_batch(monkeypatch, tweets)
+
+    page = get_home_timeline_page(None, [1, 2, 3, 4, 5], 4)
+
+    assert calls == [[1, 2], [3, 4], [5]]
+    assert [row.id for row in page] == [4, 6, 2, 3]
+
+
+def test_same_timestamp_breaks_ties_by_id(monkeypatch):
+    monkeypatch.setattr(timeline, 'FOLLOWEES_BATCH_SIZE', 1)
+    tweets = [tweet(1, 1, 5), tweet(2, 2, 5), tweet(3, 1, 5), tweet(4, 2, 0)]
+    stub_fetch_batch(monkeypatch, tweets)
+
+    page = get_home_timeline_page(None, [1, 2], 10)
+
+    assert [row.id for row in page] == [3, 2, 1, 4]
+
+
+def test_duplicate_followees_are_fetched_once(monkeypatch):
+    monkeypatch.setattr(timeline, 'FOLLOWEES_BATCH_SIZE', 2)
+    tweets = [tweet(1, 1, 0), tweet(2, 2, 1), tweet(3, 3, 2)]
+    calls = stub_fetch_batch(monkeypatch, tweets)
+
+    page = get_home_timeline_page(None, [1, 2, 1, 3, 2], 10)
+
+    assert calls == [[1, 2], [3]]
+    assert [row.id for row in page] == [3, 2, 1]
+
+
+def test_pages_with_cursor(monkeypatch):
+    monkeypatch.setattr(timeline, 'FOLLOWEES_BATCH_SIZE', 1)
+    tweets = [tweet(1, 1, 0), tweet(2, 2, 1), tweet(3, 1, 1), tweet(4, 2, 3), tweet(5, 1, 4)]
+    stub_fetch_batch(monkeypatch, tweets)
+
+    first_page = get_home_timeline_page(None, [1, 2], 2)
+    assert [row.id for row in first_page] == [5, 4]
+
+    before = parse_cursor(make_cursor(first_page[-1]))
+    second_page = get_home_timeline_page(None, [1, 2], 2, before)
+    assert [row.id for row in second_page] == [3, 2]
+
+
+def test_parse_cursor():
+    assert parse_cursor("2023-10-01T12:05:00.123456,42") == (datetime(2023, 10, 1, 12, 5, 0, 123456), 42)
+
+    for cursor in ["", "42", "yesterday,42", "2023-10-01T12:05:00,abc"]:
+        with pytest.raises(ValueError):
+            parse_cursor(cursor)
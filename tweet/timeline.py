@@ -0,0 +1,84 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# How many followees are sent to Postgres in a single array parameter
+FOLLOWEES_BATCH_SIZE = 500
+
+# For every followee in the batch, only the newest `:limit` tweets (older than
+# the cursor, if there is one) are read through the (user_id, created_at) index,
+# and Postgres keeps only the newest `:limit` of those for the whole batch, so
+# each batch comes back as a sorted stream. Tweets without created_at can't be
+# ordered or paged through, so they are left out of the home timeline.
+NEWEST_TWEETS_PER_BATCH = """
+    SELECT t.id, t.user_id, t.content, t.created_at
+    FROM unnest(CAST(:followee_ids AS integer[])) AS f(user_id)
+    CROSS JOIN LATERAL (
+        SELECT id, user_id, content, created_at
+        FROM tweets
+        WHERE tweets.user_id = f.user_id
+          AND created_at IS NOT NULL
+          {cursor_filter}
+        ORDER BY created_at DESC, id DESC
+        LIMIT :limit
+    ) AS t
+    ORDER BY t.created_at DESC, t.id DESC
+    LIMIT :limit
+"""
+
+FIRST_PAGE_QUERY = text(NEWEST_TWEETS_PER_BATCH.format(cursor_filter=""))
+NEXT_PAGE_QUERY = text(NEWEST_TWEETS_PER_BATCH.format(
+    cursor_filter="AND (created_at, id) < (:before_created_at, :before_id)"
+))
+
+
+def parse_cursor(before: str):
+    """Parse a `<created_at>,<id>` cursor, raises ValueError if it is malformed."""
+    created_at, tweet_id = before.rsplit(',', 1)
+    return datetime.fromisoformat(created_at), int(tweet_id)
+
+
+def make_cursor(tweet):
+    return f"{tweet.created_at.isoformat()},{tweet.id}"
+
+
+def _newest_first(row):
+    return (row.created_at, row.id)
+
+
+def fetch_batch(db: Session, followee_ids: list[int], limit: int, before=None):
+    if before is None:
+        return db.execute(
+            FIRST_PAGE_QUERY,
+            {"followee_ids": followee_ids, "limit": limit}
+        ).all()
+
+    before_created_at, before_id = before
+    return db.execute(
+        NEXT_PAGE_QUERY,
+        {
+            "followee_ids": followee_ids,
+            "limit": limit,
+            "before_created_at": before_created_at,
+            "before_id": before_id
+        }
+    ).all()
+
+
+def get_home_timeline_page(db: Session, followings: list[int], limit: int, before=None):
+    followee_ids = list(dict.fromkeys(followings))
+
+    # Every batch has to be queried, since any of them may hold the newest
+    # tweets; each one returns at most `limit` rows, so the merge below never
+    # looks at more than `limit` rows per batch and stops when the page is full
+    batches = [
+        fetch_batch(db, followee_ids[start:start + FOLLOWEES_BATCH_SIZE], limit, before)
+        for start in range(0, len(followee_ids), FOLLOWEES_BATCH_SIZE)
+    ]
+    merged = heapq.merge(*batches, key=_newest_first, reverse=True)
+
+    return list(islice(merged, limit))
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe, per-process cache that keeps the `capacity` most recently used entries.
+
+    Entries expire `ttl_seconds` after they were stored, so changes made through
+    another process are picked up after at most that long.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl_seconds: float = 30):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get_many(self, keys):
+        found = {}
+        now = time.monotonic()
+
+        with self.lock:
+            for key in keys:
+                if key not in self.entries:
+                    continue
+
+                value, expires_at = self.entries[key]
+                if expires_at <= now:
+                    del self.entries[key]
+                    continue
+
+                self.entries.move_to_end(key)
+                found[key] = value
+
+        return found
+
+    def put_many(self, items: dict):
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self.lock:
+            for key, value in items.items():
+                self.entries[key] = (value, expires_at)
+                self.entries.move_to_end(key)
+
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def evict(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
@@ -10,6 +10,10 @@ from sqlalchemy.orm import sessionmaker, Session
 from models import User, Base, Followings
 from schemas import UserInDB, UserCreate, FollowCreate, FollowResponse
 from schemas import UnfollowCreate, FollowingsResponse, FollowersResponse
+from schemas import UserPublic, UsersResponse
+from singleflight import SingleFlight
+from cache import LRUCache
+from groupcommit import GroupCommitter
 
 
 # Database Connection Settings
@@ -43,6 +47,36 @@ SELF_PORT = os.getenv('SELF_PORT') or '8000'
 
 TIMEOUT_SECONDS = 5
 
+
+# Request Coalescing Settings
+SINGLEFLIGHT_MAX_WAITERS = int(os.getenv('SINGLEFLIGHT_MAX_WAITERS') or '100')
+single_flight = SingleFlight(max_waiters=SINGLEFLIGHT_MAX_WAITERS)
+
+
+# Public profiles of recently requested users, only id and username are kept
+USER_PROFILE_CACHE_SIZE = int(os.getenv('USER_PROFILE_CACHE_SIZE') or '1024')
+USER_PROFILE_CACHE_TTL_SECONDS = float(os.getenv('USER_PROFILE_CACHE_TTL_SECONDS') or '30')
+user_profiles = LRUCache(capacity=USER_PROFILE_CACHE_SIZE, ttl_seconds=USER_PROFILE_CACHE_TTL_SECONDS)
+
+# Upper bound on the ids of a single GET /users call, well below the cache size.
+# The tweet service splits author lookups by AUTHORS_BATCH_SIZE, keep it at most this
+USERS_BATCH_MAX_IDS = 100
+
+
+# Group Commit Settings
+GROUP_COMMIT_ENABLED = (os.getenv('GROUP_COMMIT_ENABLED') or 'false').lower() in ('1', 'true')
+GROUP_COMMIT_MAX_BATCH_SIZE = int(os.getenv('GROUP_COMMIT_MAX_BATCH_SIZE') or '64')
+GROUP_COMMIT_MAX_DELAY_MS = int(os.getenv('GROUP_COMMIT_MAX_DELAY_MS') or '5')
+# Shorter than timeout_middleware, so a stalled committer answers the request
+# itself and frees the handler thread instead of leaking it past the 408
+GROUP_COMMIT_TIMEOUT_SECONDS = TIMEOUT_SECONDS - 1
+group_committer = GroupCommitter(
+    SessionLocal,
+    max_batch_size=GROUP_COMMIT_MAX_BATCH_SIZE,
+    max_delay_ms=GROUP_COMMIT_MAX_DELAY_MS,
+    timeout_seconds=GROUP_COMMIT_TIMEOUT_SECONDS
+) if GROUP_COMMIT_ENABLED else None
+
 app = FastAPI()
 
 
@@ -107,6 +141,11 @@ def metrics():
     for status_code, counter in status_codes.items():
         list.append(f'http_requests_total{{code="{status_code}"}} {counter}')
 
+    list.extend(single_flight.metrics())
+
+    if group_committer is not None:
+        list.extend(group_committer.metrics())
+
     return '\n'.join(list)
 
 
@@ -122,6 +161,28 @@ def read_status():
     return {"status": "OK"}
 
 
+@app.get("/users", response_model=UsersResponse)
+def get_users(ids: str, db: Session = Depends(get_db)):
+    try:
+        user_ids = list(dict.fromkeys(int(value) for value in ids.split(',') if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma separated list of integers")
+
+    if len(user_ids) > USERS_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {USERS_BATCH_MAX_IDS} ids can be requested at once")
+
+    profiles = user_profiles.get_many(user_ids)
+    missing_ids = [user_id for user_id in user_ids if user_id not in profiles]
+
+    if missing_ids:
+        users = db.query(User.id, User.username).filter(User.id.in_(missing_ids)).all()
+        fetched = {user.id: UserPublic(id=user.id, username=user.username) for user in users}
+        user_profiles.put_many(fetched)
+        profiles.update(fetched)
+
+    return {"users": [profiles[user_id] for user_id in user_ids if user_id in profiles]}
+
+
 @app.post("/users/register", response_model=UserInDB)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.username == user.username).first()
@@ -138,19 +199,31 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 @app.post("/users/{userId}/follow", response_model=FollowResponse)
 def create_follow(userId: int, follow: FollowCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == userId).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    def write_follow(session: Session):
+        user = session.query(User).filter(User.id == userId).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        follow_user = session.query(User).filter(User.id == follow.followUserId).first()
+        if not follow_user:
+            raise HTTPException(status_code=404, detail="User to follow not found")
 
-    follow_user = db.query(User).filter(User.id == follow.followUserId).first()
-    if not follow_user:
-        raise HTTPException(status_code=404, detail="User to follow not found")
+        new_follow = Followings(follower_id=userId, followed_id=follow_user.id)
+        session.add(new_follow)
+        session.flush()
 
-    new_follow = Followings(follower_id=userId, followed_id=follow_user.id)
-    db.add(new_follow)
+        return {"message": f"User {user.username} is now following {follow_user.username}"}
+
+    if group_committer is not None:
+        try:
+            return group_committer.submit(write_follow)
+        except TimeoutError:
+            return JSONResponse(status_code=408, content={"error": "Request timed out"})
+
+    response = write_follow(db)
     db.commit()
 
-    return {"message": f"User {user.username} is now following {follow_user.username}"}
+    return response
 
 
 @app.delete("/users/{userId}/unfollow", response_model=FollowResponse)
@@ -183,28 +256,34 @@ def delete_follow(userId: int, unfollow: UnfollowCreate, db: Session = Depends(g
 
 @app.get("/users/{userId}/followings", response_model=FollowingsResponse)
 def get_followings(userId: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == userId).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    def query_followings():
+        user = db.query(User).filter(User.id == userId).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
 
-    followings = db.query(Followings).filter(
-        Followings.follower_id == userId).all()
-    followings_ids = [following.followed_id for following in followings]
+        followings = db.query(Followings).filter(
+            Followings.follower_id == userId).all()
+        followings_ids = [following.followed_id for following in followings]
 
-    return {"followings": followings_ids}
+        return {"followings": followings_ids}
+
+    return single_flight.do("get_followings", (userId,), query_followings)
 
 
 @app.get("/users/{userId}/followers", response_model=FollowersResponse)
 def get_followers(userId: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == userId).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    def query_followers():
+        user = db.query(User).filter(User.id == userId).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        followers = db.query(Followings).filter(
+            Followings.followed_id == userId).all()
+        followers_ids = [follower.follower_id for follower in followers]
 
-    followers = db.query(Followings).filter(
-        Followings.followed_id == userId).all()
-    followers_ids = [follower.follower_id for follower in followers]
+        return {"followers": followers_ids}
 
-    return {"followers": followers_ids}
+    return single_flight.do("get_followers", (userId,), query_followers)
 
 
 import uuid
@@ -223,6 +302,7 @@ def erase_user_first_phase(userId: int):
         raise HTTPException(status_code=404, detail="User not found")
     
     session.delete(user)
+    session.info['user_id'] = userId
     session_id = str(uuid.uuid4())
     sessions[session_id] = session
 
@@ -236,8 +316,10 @@ def erase_user_commit(sessionId: str):
     if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    user_id = session.info.get('user_id')
     session.commit()
     session.close()
+    user_profiles.evict(user_id)
 
     return {"message": f"Session {sessionId} committed successfully"}
 
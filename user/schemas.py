@@ -34,3 +34,12 @@ class FollowingsResponse(BaseModel):
 
 class FollowersResponse(BaseModel):
     followers: List[int]
+
+
+class UserPublic(BaseModel):
+    id: int
+    username: str
+
+
+class UsersResponse(BaseModel):
+    users: List[UserPublic]
@@ -0,0 +1,82 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of `fn`.
+
+    The first caller (the leader) runs `fn`, every caller arriving while it is
+    still running waits for the leader and receives the same result, or the
+    same exception. Once `max_waiters` callers are waiting on a key, further
+    callers run `fn` on their own instead of piling up behind the leader.
+    Nothing is kept once the leader finishes, so results are never stale.
+    """
+
+    def __init__(self, max_waiters: int = 100):
+        self.max_waiters = max_waiters
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executed = {}
+        self.coalesced = {}
+
+    def do(self, route: str, params: tuple, fn):
+        key = (route, params)
+
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None and call.waiters < self.max_waiters:
+                call.waiters += 1
+                self.coalesced[route] = self.coalesced.get(route, 0) + 1
+                leader = False
+            else:
+                self.executed[route] = self.executed.get(route, 0) + 1
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self.calls[key] = call
+                else:
+                    call = None
+
+        if leader:
+            return self._lead(key, call, fn)
+
+        if call is None:
+            return fn()
+
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _lead(self, key, call, fn):
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+    def metrics(self):
+        lines = [
+            '# HELP singleflight_requests_total Requests that executed or joined an in-flight call.',
+            '# TYPE singleflight_requests_total counter'
+        ]
+
+        with self.lock:
+            routes = sorted(set(self.executed) | set(self.coalesced))
+            for route in routes:
+                lines.append(f'singleflight_requests_total{{route="{route}",outcome="executed"}} {self.executed.get(route, 0)}')
+                lines.append(f'singleflight_requests_total{{route="{route}",outcome="coalesced"}} {self.coalesced.get(route, 0)}')
+
+        return lines
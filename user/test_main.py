@@ -1,12 +1,20 @@
 import os
 import json
+import contextlib
+import time
+import threading
 
+import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-from main import app, get_db
+import main
+from main import app, get_db, user_profiles
 from models import Base, User, Followings
+from singleflight import SingleFlight
+from groupcommit import GroupCommitter
+from cache import LRUCache
 
 
 # Delete the previous test.db file in case it exists
@@ -127,3 +135,284 @@ def test_get_followers():
     response = client.get(f"/users/{user1['id']}/followers")
     assert response.status_code == 200
     assert response.json() == {"followers": [user2['id']]}
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    executions = []
+    results = []
+
+    def slow_query():
+        executions.append(1)
+        time.sleep(0.2)
+        return {"followings": [1, 2, 3]}
+
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.do("get_followings", (1,), slow_query)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert results == [{"followings": [1, 2, 3]}] * 5
+    assert single_flight.executed == {"get_followings": 1}
+    assert single_flight.coalesced == {"get_followings": 4}
+
+
+def test_single_flight_metrics():
+    response = client.post("/users/register", json={"username": "testuser9", "password": "testpassword"})
+    assert response.status_code == 200
+    user = response.json()
+
+    response = client.get(f"/users/{user['id']}/followings")
+    assert response.status_code == 200
+
+    response = client.get("/users/999999/followings")
+    assert response.status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'singleflight_requests_total{route="get_followings",outcome="executed"}' in response.text
+    assert 'singleflight_requests_total{route="get_followings",outcome="coalesced"}' in response.text
+
+
+def wait_for_waiters(single_flight, key, waiters):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with single_flight.lock:
+            call = single_flight.calls.get(key)
+            if call is not None and call.waiters == waiters:
+                return
+        time.sleep(0.01)
+    raise AssertionError(f"{waiters} waiters never joined {key}")
+
+
+def test_single_flight_propagates_leader_error_to_waiters():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing_query():
+        release.wait()
+        raise ValueError("database is down")
+
+    def call():
+        try:
+            single_flight.do("get_followings", (1,), failing_query)
+        except ValueError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    threads[0].start()
+    wait_for_waiters(single_flight, ("get_followings", (1,)), 0)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for_waiters(single_flight, ("get_followings", (1,)), 3)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [str(error) for error in errors] == ["database is down"] * 4
+    assert single_flight.executed == {"get_followings": 1}
+    assert single_flight.coalesced == {"get_followings": 3}
+    assert single_flight.calls == {}
+
+
+def test_single_flight_bounds_waiters():
+    single_flight = SingleFlight(max_waiters=2)
+    release = threading.Event()
+    results = []
+
+    def slow_query():
+        release.wait()
+        return "shared"
+
+    def call():
+        results.append(single_flight.do("get_followings", (1,), slow_query))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    wait_for_waiters(single_flight, ("get_followings", (1,)), 0)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for_waiters(single_flight, ("get_followings", (1,)), 2)
+
+    # The bound is reached, so this caller runs its own query instead of waiting
+    assert single_flight.do("get_followings", (1,), lambda: "own") == "own"
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["shared"] * 3
+    assert single_flight.executed == {"get_followings": 2}
+    assert single_flight.coalesced == {"get_followings": 2}
+
+
+def test_get_users_batch():
+    # First, create two users
+    response = client.post("/users/register", json={"username": "testuser10", "password": "testpassword"})
+    assert response.status_code == 200
+    user1 = response.json()
+
+    response = client.post("/users/register", json={"username": "testuser11", "password": "testpassword"})
+    assert response.status_code == 200
+    user2 = response.json()
+
+    # Then, fetch both of them (plus an unknown id) with a single call
+    response = client.get(f"/users?ids={user2['id']},{user1['id']},999999,{user2['id']}")
+    assert response.status_code == 200
+    assert response.json() == {"users": [
+        {"id": user2['id'], "username": "testuser11"},
+        {"id": user1['id'], "username": "testuser10"}
+    ]}
+
+    # Both profiles are now cached, so the second call doesn't query the database
+    assert set(user_profiles.get_many([user1['id'], user2['id']])) == {user1['id'], user2['id']}
+
+    statements = []
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statements)
+    try:
+        response = client.get(f"/users?ids={user1['id']}")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statements)
+
+    # Passwords are never returned
+    assert response.status_code == 200
+    assert response.json() == {"users": [{"id": user1['id'], "username": "testuser10"}]}
+    assert statements == []
+
+
+def test_get_users_batch_invalid_ids():
+    response = client.get("/users?ids=1,abc")
+    assert response.status_code == 400
+
+
+def test_get_users_batch_too_many_ids():
+    ids = ','.join(str(user_id) for user_id in range(1, main.USERS_BATCH_MAX_IDS + 2))
+    response = client.get(f"/users?ids={ids}")
+    assert response.status_code == 400
+
+
+def test_erase_user_commit_evicts_cached_profile(monkeypatch):
+    monkeypatch.setattr(main, "SessionLocal", TestingSessionLocal)
+
+    # First, create a user and cache their profile
+    response = client.post("/users/register", json={"username": "testuser13", "password": "testpassword"})
+    assert response.status_code == 200
+    user = response.json()
+
+    response = client.get(f"/users?ids={user['id']}")
+    assert response.status_code == 200
+    assert user['id'] in user_profiles.get_many([user['id']])
+
+    # Then, delete the user with both phases of the two phase commit
+    response = client.delete(f"/users/{user['id']}/first")
+    assert response.status_code == 200
+    session_id = response.json()['session']
+
+    response = client.get(f"/users/sessions/{session_id}/commit")
+    assert response.status_code == 200
+
+    # Finally, the profile is gone from the cache and from the response
+    assert user_profiles.get_many([user['id']]) == {}
+    response = client.get(f"/users?ids={user['id']}")
+    assert response.status_code == 200
+    assert response.json() == {"users": []}
+
+
+def test_lru_cache_capacity_and_ttl():
+    cache = LRUCache(capacity=2, ttl_seconds=60)
+    cache.put_many({1: "a", 2: "b"})
+    cache.get_many([1])
+    cache.put_many({3: "c"})
+
+    # 2 was the least recently used entry
+    assert cache.get_many([1, 2, 3]) == {1: "a", 3: "c"}
+
+    expired = LRUCache(capacity=2, ttl_seconds=0)
+    expired.put_many({1: "a"})
+    assert expired.get_many([1]) == {}
+
+
+def test_create_follow_with_group_commit(monkeypatch):
+    monkeypatch.setattr(main, "group_committer", GroupCommitter(TestingSessionLocal, max_delay_ms=20))
+
+    # First, create two users
+    response = client.post("/users/register", json={"username": "testuser14", "password": "testpassword"})
+    assert response.status_code == 200
+    user1 = response.json()
+
+    response = client.post("/users/register", json={"username": "testuser15", "password": "testpassword"})
+    assert response.status_code == 200
+    user2 = response.json()
+
+    # Then, send a valid follow and one for an unknown user at the same time
+    responses = {}
+
+    def follow(name, follow_user_id):
+        responses[name] = client.post(f"/users/{user1['id']}/follow", json={"followUserId": follow_user_id})
+
+    threads = [
+        threading.Thread(target=follow, args=("valid", user2['id'])),
+        threading.Thread(target=follow, args=("unknown", 999999))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every caller gets its own result
+    assert responses["valid"].status_code == 200
+    assert responses["valid"].json() == {"message": f"User {user1['username']} is now following {user2['username']}"}
+    assert responses["unknown"].status_code == 404
+    assert responses["unknown"].json() == {"detail": "User to follow not found"}
+
+    # Only the valid follow was persisted
+    response = client.get(f"/users/{user1['id']}/followings")
+    assert response.status_code == 200
+    assert response.json() == {"followings": [user2['id']]}
+
+
+class BrokenSession:
+    def begin_nested(self):
+        return contextlib.nullcontext()
+
+    def commit(self):
+        raise ConnectionError("connection lost on commit")
+
+    def rollback(self):
+        raise ConnectionError("connection lost on rollback")
+
+    def close(self):
+        pass
+
+
+def test_group_commit_survives_failed_rollback():
+    group_committer = GroupCommitter(BrokenSession, max_delay_ms=1, timeout_seconds=5)
+
+    with pytest.raises(ConnectionError, match="on commit"):
+        group_committer.submit(lambda session: "written")
+
+    # The worker is still alive and serves the next batch
+    assert group_committer.worker.is_alive()
+    with pytest.raises(ConnectionError, match="on commit"):
+        group_committer.submit(lambda session: "written")
+
+
+def test_group_commit_times_out():
+    group_committer = GroupCommitter(TestingSessionLocal, max_delay_ms=1, timeout_seconds=0.1)
+    release = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        group_committer.submit(lambda session: release.wait())
+
+    release.set()
+    assert group_committer.submit(lambda session: "written") == "written"